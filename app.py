@@ -4,12 +4,13 @@ Ayahs Audio Downloader - A Streamlit application for downloading and concatenati
 
 import os
 import time
-import re
 import streamlit as st
-import base64
 from src.audio_downloader import (
+    AYAH_REFERENCE_RE,
     get_available_reciters,
-    download_ayah_range,
+    get_cache_stats,
+    get_ayah_range_pairs,
+    download_ayah_pairs,
     get_surah_name,
     parse_ayah_reference,
     get_reciter_id_by_name
@@ -35,21 +36,7 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 # Function to validate ayah reference format
 def validate_ayah_format(ayah_ref):
     """Validate the format of an ayah reference (e.g., '2:5')"""
-    if not ayah_ref:
-        return False
-    pattern = r'^\d+:\d+$'
-    return bool(re.match(pattern, ayah_ref))
-
-# Function to get a download link for a file
-def get_download_link(file_path, link_text):
-    """Generate a download link for a file"""
-    with open(file_path, "rb") as file:
-        contents = file.read()
-    b64 = base64.b64encode(contents).decode()
-    filename = os.path.basename(file_path)
-    
-    href = f'<a href="data:audio/mp3;base64,{b64}" download="{filename}">{link_text}</a>'
-    return href
+    return bool(ayah_ref) and AYAH_REFERENCE_RE.fullmatch(ayah_ref) is not None
 
 # Main application
 def main():
@@ -68,6 +55,10 @@ def main():
     reciters = get_available_reciters()
     reciter_names = list(reciters.values())
     
+    # Show how well the metadata caches are doing, to help tune their TTLs
+    with st.sidebar.expander("Cache stats"):
+        st.json(get_cache_stats())
+    
     # Input for ayah range
     st.subheader("Select Ayah Range")
     
@@ -119,14 +110,17 @@ def main():
                 # Get surah name for the output filename
                 surah_name = get_surah_name(start_surah)
                 
+                # Expand the range up front so invalid ranges are reported immediately
+                pairs = get_ayah_range_pairs(start_ayah, end_ayah)
+                
+                # Generate output filename
+                output_filename = generate_output_filename(start_ayah, end_ayah, surah_name)
+                output_file_path = os.path.join(OUTPUT_DIR, output_filename)
+                
                 # Download the audio files
-                audio_files = download_ayah_range(start_ayah, end_ayah, reciter_id, TEMP_DIR)
+                audio_files = download_ayah_pairs(pairs, reciter_id, TEMP_DIR)
                 
                 if audio_files:
-                    # Generate output filename
-                    output_filename = generate_output_filename(start_ayah, end_ayah, surah_name)
-                    output_file_path = os.path.join(OUTPUT_DIR, output_filename)
-                    
                     # Concatenate the audio files
                     result = concatenate_audio_files(audio_files, output_file_path)
                     
@@ -144,15 +138,22 @@ def main():
             st.error(f"Error: {str(e)}")
             st.session_state.processing = False
     
-    # Display download link if output file is ready
+    # Display download button if output file is ready
     if st.session_state.output_file and os.path.exists(st.session_state.output_file):
+        # Both widgets load the whole file anyway, so read it once and share the bytes
+        with open(st.session_state.output_file, "rb") as file:
+            audio_bytes = file.read()
+        
         st.subheader("Download")
-        st.markdown(get_download_link(st.session_state.output_file, "Download Audio File"), unsafe_allow_html=True)
+        st.download_button(
+            "Download Audio File",
+            audio_bytes,
+            file_name=os.path.basename(st.session_state.output_file),
+            mime="audio/mp3"
+        )
         
         # Add option to play the audio directly
         st.subheader("Listen")
-        audio_file = open(st.session_state.output_file, "rb")
-        audio_bytes = audio_file.read()
         st.audio(audio_bytes, format="audio/mp3")
 
 if __name__ == "__main__":
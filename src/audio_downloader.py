@@ -3,11 +3,33 @@ Module for downloading Quran audio files from the Quran API.
 """
 
 import os
+import re
 import json
+import time
+import hashlib
+import asyncio
+import importlib.util
+import functools
+import tempfile
+import threading
 import requests
-from typing import List, Dict, Tuple, Optional
+import streamlit as st
+from streamlit.runtime.caching import get_data_cache_stats_provider
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from typing import Any, Callable, List, Dict, Set, Tuple, Optional
 import logging
 
+# httpx with its HTTP/2 extra (h2) is optional; without it downloads use threaded requests
+if importlib.util.find_spec("httpx") and importlib.util.find_spec("h2"):
+    import httpx
+    # httpx logs every request at INFO, which would be one record per ayah
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+else:
+    httpx = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -16,6 +38,68 @@ logger = logging.getLogger(__name__)
 API_BASE_URL = "https://quranapi.pages.dev/api"
 AUDIO_BASE_URL = "https://the-quran-project.github.io/Quran-Audio/Data"
 
+# Ayah reference in the format 'surah:ayah', capturing both numbers (use with fullmatch)
+AYAH_REFERENCE_RE = re.compile(r'(\d+):(\d+)')
+
+# Responses up to this size are written in a single call instead of streamed in chunks
+STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+# Number of ayahs downloaded concurrently
+MAX_DOWNLOAD_WORKERS = 16
+
+# Retries for failed connections, shared by the requests and HTTP/2 download paths
+DOWNLOAD_RETRIES = 3
+
+# Timeout in seconds for each HTTP request, so a stalled connection cannot hang a range
+DOWNLOAD_TIMEOUT = 30
+
+# Number of surah metadata documents fetched concurrently
+MAX_METADATA_WORKERS = 8
+
+# Shared session so downloads reuse pooled connections instead of a new TLS handshake per ayah
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=MAX_DOWNLOAD_WORKERS,
+    pool_maxsize=MAX_DOWNLOAD_WORKERS,
+    max_retries=Retry(total=DOWNLOAD_RETRIES, backoff_factor=0.3)
+))
+
+# API metadata never changes, so cached lookups are kept for a day
+METADATA_CACHE_TTL = 24 * 3600
+
+# Persistent cache of API responses so metadata survives server restarts
+API_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "temp_data", "api_cache")
+API_CACHE_MAX_AGE = 30 * 24 * 3600
+
+# After this many primary-source 404s in a row, a reciter's remaining ayahs in the
+# range try the fallback source first
+PRIMARY_MISS_THRESHOLD = 3
+
+# Consecutive primary-source 404s per reciter, reset at the start of every range download
+_primary_misses: Dict[str, int] = {}
+_primary_misses_lock = threading.Lock()
+
+# Memoized fallback audio URLs keyed by (surah, ayah, reciter)
+_fallback_urls: Dict[Tuple[int, int, str], Optional[str]] = {}
+
+# Paths of audio files known to exist, per scanned output directory,
+# so repeated downloads are a set lookup instead of filesystem calls
+_existing_files: Dict[str, Set[str]] = {}
+
+# Lookup and miss counters of the cached metadata functions, keyed by function name
+_cache_lookups: Counter = Counter()
+_cache_misses: Counter = Counter()
+_cache_stats_lock = threading.Lock()
+
+# Default reciters based on API documentation
+DEFAULT_RECITERS = {
+    "1": "Mishary Rashid Al Afasy",
+    "2": "Abu Bakr Al Shatri",
+    "3": "Nasser Al Qatami",
+    "4": "Yasser Al Dosari",
+    "5": "Hani Ar Rifai"
+}
+
 
 def parse_ayah_reference(ayah_ref: str) -> Tuple[int, int]:
     """
@@ -27,12 +111,123 @@ def parse_ayah_reference(ayah_ref: str) -> Tuple[int, int]:
     Returns:
         Tuple of (surah_number, ayah_number)
     """
-    try:
-        surah_num, ayah_num = map(int, ayah_ref.split(':'))
-        return surah_num, ayah_num
-    except Exception as e:
-        logger.error(f"Error parsing ayah reference: {e}")
+    match = AYAH_REFERENCE_RE.fullmatch(ayah_ref) if ayah_ref else None
+    if match is None:
+        logger.error(f"Error parsing ayah reference: {ayah_ref!r}")
         raise ValueError(f"Invalid ayah reference format: {ayah_ref}. Expected format: 'surah:ayah', e.g., '2:5'")
+    return int(match.group(1)), int(match.group(2))
+
+
+def _cached_metadata(func: Callable) -> Callable:
+    """
+    Cache a metadata function with st.cache_data, counting its lookups and misses.
+    
+    Args:
+        func: The function to cache
+        
+    Returns:
+        The cached function
+    """
+    name = func.__name__
+    
+    # Only runs on a cache miss
+    @functools.wraps(func)
+    def compute(*args: Any, **kwargs: Any) -> Any:
+        with _cache_stats_lock:
+            _cache_misses[name] += 1
+        return func(*args, **kwargs)
+    
+    cached = st.cache_data(ttl=METADATA_CACHE_TTL, show_spinner=False)(compute)
+    
+    @functools.wraps(func)
+    def lookup(*args: Any, **kwargs: Any) -> Any:
+        with _cache_stats_lock:
+            _cache_lookups[name] += 1
+        return cached(*args, **kwargs)
+    
+    lookup.clear = cached.clear
+    return lookup
+
+
+def get_cache_stats() -> List[Dict[str, Any]]:
+    """
+    Get the lookup statistics of the cached metadata functions in this process.
+    
+    Returns:
+        One dictionary per cached function with its lookups, misses, hit ratio and
+        the memory its cached entries take
+    """
+    # Streamlit names each function's cache after the function's module and qualified name
+    cache_bytes: Counter = Counter()
+    for stat in get_data_cache_stats_provider().get_stats():
+        cache_bytes[stat.cache_name] += stat.byte_length
+    
+    with _cache_stats_lock:
+        return [
+            {
+                'function': name,
+                'lookups': lookups,
+                'misses': _cache_misses[name],
+                'hit_ratio': round(1 - _cache_misses[name] / lookups, 3),
+                'bytes': cache_bytes[f"{__name__}.{name}"],
+            }
+            for name, lookups in sorted(_cache_lookups.items())
+        ]
+
+
+def cached_get_json(url: str) -> Dict:
+    """
+    Fetch a JSON document, reusing a copy stored on disk if it is recent enough.
+    
+    Args:
+        url: The URL of the JSON document
+        
+    Returns:
+        The parsed JSON data
+    """
+    cache_path = os.path.join(API_CACHE_DIR, f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json")
+    
+    # Serve from disk if the cached copy is fresh
+    try:
+        if time.time() - os.path.getmtime(cache_path) < API_CACHE_MAX_AGE:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    
+    response = SESSION.get(url, timeout=DOWNLOAD_TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+    
+    # Write to a temporary file first so readers never see a partial document
+    try:
+        os.makedirs(API_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=API_CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, cache_path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"Could not write API cache for {url}: {e}")
+    
+    return data
+
+
+@_cached_metadata
+def get_surah_metadata(surah_num: int) -> Dict:
+    """
+    Get the full metadata of a surah (name, total ayahs, ...) from the API.
+    
+    Args:
+        surah_num: The surah number
+        
+    Returns:
+        The surah JSON data
+    """
+    return cached_get_json(f"{API_BASE_URL}/{surah_num}.json")
 
 
 def get_surah_name(surah_num: int) -> str:
@@ -46,16 +241,35 @@ def get_surah_name(surah_num: int) -> str:
         The name of the surah
     """
     try:
-        url = f"{API_BASE_URL}/{surah_num}.json"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = get_surah_metadata(surah_num)
         return data.get('surahName', f"Surah{surah_num}")
     except Exception as e:
         logger.error(f"Error fetching surah name: {e}")
         return f"Surah{surah_num}"
 
 
+@_cached_metadata
+def _fetch_reciters() -> Dict[str, str]:
+    """
+    Fetch the reciters from the API, raising on failure so errors are not cached.
+    
+    Returns:
+        Dictionary mapping reciter IDs to reciter names
+    """
+    return cached_get_json(f"{API_BASE_URL}/reciters.json")
+
+
+@_cached_metadata
+def _get_reciter_ids_by_name() -> Dict[str, str]:
+    """
+    Build the reverse lookup of reciter names to reciter IDs.
+    
+    Returns:
+        Dictionary mapping reciter names to reciter IDs
+    """
+    return {name: reciter_id for reciter_id, name in _fetch_reciters().items()}
+
+
 def get_available_reciters() -> Dict[str, str]:
     """
     Get a list of available reciters from the API.
@@ -64,23 +278,133 @@ def get_available_reciters() -> Dict[str, str]:
         Dictionary mapping reciter IDs to reciter names
     """
     try:
-        url = f"{API_BASE_URL}/reciters.json"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return _fetch_reciters()
     except Exception as e:
         logger.error(f"Error fetching reciters: {e}")
-        # Default reciters based on API documentation
-        return {
-            "1": "Mishary Rashid Al Afasy",
-            "2": "Abu Bakr Al Shatri",
-            "3": "Nasser Al Qatami",
-            "4": "Yasser Al Dosari",
-            "5": "Hani Ar Rifai"
-        }
+        return dict(DEFAULT_RECITERS)
+
+
+def _write_response(response: Any, file_path: str) -> None:
+    """
+    Save a response body to disk.
+    
+    Single-ayah audio is small, so the body is normally written in one call; only
+    streamed requests responses larger than STREAM_THRESHOLD_BYTES (or of unknown
+    size) are written in chunks.
+    
+    Args:
+        response: A requests response opened with stream=True, or an httpx response
+            whose body has already been read
+        file_path: Path to save the body to
+    """
+    content_length = response.headers.get('Content-Length')
+    stream = isinstance(response, requests.Response) and (
+        content_length is None or int(content_length) > STREAM_THRESHOLD_BYTES
+    )
+    with open(file_path, 'wb') as f:
+        if stream:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+        else:
+            f.write(response.content)
+
+
+def _remember_existing_file(file_path: str) -> None:
+    """
+    Record a newly written audio file in the index of its directory, if it was scanned.
+    
+    Args:
+        file_path: Path of the audio file that was written
+    """
+    known_files = _existing_files.get(os.path.dirname(file_path))
+    if known_files is not None:
+        known_files.add(file_path)
+
+
+def _record_primary_result(reciter_id: str, status_code: int) -> None:
+    """
+    Update the reciter's primary-source miss count from a download's status code.
+    
+    Args:
+        reciter_id: The reciter ID
+        status_code: HTTP status code of the primary-source response
+    """
+    with _primary_misses_lock:
+        if status_code == 404:
+            _primary_misses[reciter_id] = _primary_misses.get(reciter_id, 0) + 1
+        elif status_code < 400:
+            _primary_misses[reciter_id] = 0
+
+
+def _primary_source_missing(reciter_id: str) -> bool:
+    """
+    Check whether the primary source keeps missing audio for a reciter.
+    
+    Args:
+        reciter_id: The reciter ID
+        
+    Returns:
+        True if the fallback source should be tried first
+    """
+    return _primary_misses.get(reciter_id, 0) >= PRIMARY_MISS_THRESHOLD
+
+
+def _reset_primary_misses(reciter_id: str) -> None:
+    """
+    Forget the reciter's primary-source misses so a new range starts with the primary.
+    
+    Args:
+        reciter_id: The reciter ID
+    """
+    with _primary_misses_lock:
+        _primary_misses.pop(reciter_id, None)
+
+
+def _audio_file_exists(output_dir: str, file_path: str) -> bool:
+    """
+    Check whether an ayah's audio file has already been downloaded.
+    
+    Args:
+        output_dir: Directory the downloaded audio is saved to
+        file_path: Path of the ayah's audio file
+        
+    Returns:
+        True if the file exists
+    """
+    # Scanned directories already exist and have their files indexed
+    if output_dir in _existing_files:
+        return file_path in _existing_files[output_dir]
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.exists(file_path)
+
+
+def _save_primary_response(response: Any, reciter_id: str, file_path: str) -> str:
+    """
+    Record the outcome of a primary-source request and save its audio.
+    
+    Args:
+        response: The requests or httpx response for the primary audio URL
+        reciter_id: The reciter ID
+        file_path: Path to save the downloaded audio
+        
+    Returns:
+        Path to the downloaded audio file
+        
+    Raises:
+        Exception: If the response is an HTTP error
+    """
+    _record_primary_result(reciter_id, response.status_code)
+    response.raise_for_status()
+    
+    _write_response(response, file_path)
+    _remember_existing_file(file_path)
+    
+    logger.debug("Downloaded audio file: %s", file_path)
+    return file_path
 
 
-def download_ayah_audio(surah_num: int, ayah_num: int, reciter_id: str, output_dir: str) -> Optional[str]:
+def download_ayah_audio(surah_num: int, ayah_num: int, reciter_id: str, output_dir: str,
+                        session: requests.Session = SESSION) -> Optional[str]:
     """
     Download audio for a specific ayah from a specific reciter.
     
@@ -89,84 +413,113 @@ def download_ayah_audio(surah_num: int, ayah_num: int, reciter_id: str, output_d
         ayah_num: The ayah number
         reciter_id: The reciter ID
         output_dir: Directory to save the downloaded audio
+        session: HTTP session used for the requests
         
     Returns:
         Path to the downloaded audio file or None if download fails
     """
+    # Format the file path
+    file_path = os.path.join(output_dir, f"{surah_num}_{ayah_num}_{reciter_id}.mp3")
+    tried_fallback = False
+    
     try:
-        # Create directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Format the file path
-        file_path = os.path.join(output_dir, f"{surah_num}_{ayah_num}_{reciter_id}.mp3")
-        
         # If file already exists, return its path
-        if os.path.exists(file_path):
-            logger.info(f"Audio file already exists: {file_path}")
+        if _audio_file_exists(output_dir, file_path):
+            logger.debug("Audio file already exists: %s", file_path)
             return file_path
             
+        # Try the fallback first if the primary source keeps missing this reciter,
+        # still falling through to the primary if the fallback fails
+        if _primary_source_missing(reciter_id):
+            tried_fallback = True
+            fallback_path = _download_from_fallback(surah_num, ayah_num, reciter_id, file_path, session)
+            if fallback_path:
+                return fallback_path
+            
         # Construct the URL for the audio file
         audio_url = f"{AUDIO_BASE_URL}/{reciter_id}/{surah_num}_{ayah_num}.mp3"
         
         # Try to get the audio file
-        response = requests.get(audio_url, stream=True)
-        response.raise_for_status()
-        
-        # Save the audio file
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                
-        logger.info(f"Downloaded audio file: {file_path}")
-        return file_path
+        response = session.get(audio_url, stream=True, timeout=DOWNLOAD_TIMEOUT)
+        return _save_primary_response(response, reciter_id, file_path)
         
     except Exception as e:
+        if tried_fallback:
+            logger.error("Failed to download audio from both sources: %s", e)
+            return None
+        
         # If we get an error, try to retrieve the original URL from the API
-        try:
-            logger.warning(f"Error downloading audio from primary source: {e}")
-            logger.info("Trying fallback URL...")
-            
-            # Get ayah details to find the originalUrl
-            url = f"{API_BASE_URL}/{surah_num}/{ayah_num}.json"
-            response = requests.get(url)
+        logger.warning("Error downloading audio from primary source, trying fallback URL: %s", e)
+        return _download_from_fallback(surah_num, ayah_num, reciter_id, file_path, session)
+
+
+def _get_fallback_url(surah_num: int, ayah_num: int, reciter_id: str) -> Optional[str]:
+    """
+    Look up the original audio URL of an ayah for a reciter, memoizing the result.
+    
+    Args:
+        surah_num: The surah number
+        ayah_num: The ayah number
+        reciter_id: The reciter ID
+        
+    Returns:
+        The original audio URL or None if the API has none
+    """
+    key = (surah_num, ayah_num, reciter_id)
+    if key not in _fallback_urls:
+        # Get ayah details to find the originalUrl
+        data = cached_get_json(f"{API_BASE_URL}/{surah_num}/{ayah_num}.json")
+        audio_data = data.get('audio', {})
+        _fallback_urls[key] = audio_data.get(reciter_id, {}).get('originalUrl')
+    return _fallback_urls[key]
+
+
+def _download_from_fallback(surah_num: int, ayah_num: int, reciter_id: str, file_path: str,
+                            session: requests.Session) -> Optional[str]:
+    """
+    Download an ayah from the original URL listed by the API.
+    
+    Args:
+        surah_num: The surah number
+        ayah_num: The ayah number
+        reciter_id: The reciter ID
+        file_path: Path to save the downloaded audio
+        session: HTTP session used for the requests
+        
+    Returns:
+        Path to the downloaded audio file or None if download fails
+    """
+    try:
+        original_url = _get_fallback_url(surah_num, ayah_num, reciter_id)
+        
+        if original_url:
+            response = session.get(original_url, stream=True, timeout=DOWNLOAD_TIMEOUT)
             response.raise_for_status()
-            data = response.json()
             
-            # Get the original URL for the reciter
-            audio_data = data.get('audio', {})
-            original_url = audio_data.get(reciter_id, {}).get('originalUrl')
+            _write_response(response, file_path)
+            _remember_existing_file(file_path)
             
-            if original_url:
-                response = requests.get(original_url, stream=True)
-                response.raise_for_status()
-                
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                
-                logger.info(f"Downloaded audio file from fallback URL: {file_path}")
-                return file_path
-            else:
-                logger.error("No fallback URL available")
-                return None
-                
-        except Exception as inner_e:
-            logger.error(f"Failed to download audio: {inner_e}")
+            logger.debug("Downloaded audio file from fallback URL: %s", file_path)
+            return file_path
+        else:
+            logger.error("No fallback URL available")
             return None
+            
+    except Exception as e:
+        logger.error("Failed to download audio: %s", e)
+        return None
 
 
-def download_ayah_range(start_ayah: str, end_ayah: str, reciter_id: str, output_dir: str) -> List[str]:
+def get_ayah_range_pairs(start_ayah: str, end_ayah: str) -> List[Tuple[int, int]]:
     """
-    Download a range of ayahs and return the paths to the downloaded files.
+    Expand an ayah range into the ordered list of (surah, ayah) pairs it covers.
     
     Args:
         start_ayah: Starting ayah in the format 'surah:ayah'
         end_ayah: Ending ayah in the format 'surah:ayah'
-        reciter_id: The reciter ID
-        output_dir: Directory to save the downloaded audio files
         
     Returns:
-        List of paths to the downloaded audio files in sequence
+        List of (surah_number, ayah_number) tuples in recitation order
     """
     start_surah, start_ayah_num = parse_ayah_reference(start_ayah)
     end_surah, end_ayah_num = parse_ayah_reference(end_ayah)
@@ -175,56 +528,181 @@ def download_ayah_range(start_ayah: str, end_ayah: str, reciter_id: str, output_
     if start_surah > end_surah or (start_surah == end_surah and start_ayah_num > end_ayah_num):
         raise ValueError("End ayah must come after start ayah")
     
-    downloaded_files = []
+    pairs = []
     
     # If the ayahs are in the same surah
     if start_surah == end_surah:
-        for ayah_num in range(start_ayah_num, end_ayah_num + 1):
-            file_path = download_ayah_audio(start_surah, ayah_num, reciter_id, output_dir)
-            if file_path:
-                downloaded_files.append(file_path)
+        pairs.extend((start_surah, ayah_num) for ayah_num in range(start_ayah_num, end_ayah_num + 1))
     else:
         # Handle ayahs across multiple surahs
-        # First, get the total number of ayahs in the starting surah
+        # First, fetch the metadata of every surah before the ending one concurrently
         try:
-            url = f"{API_BASE_URL}/{start_surah}.json"
-            response = requests.get(url)
-            response.raise_for_status()
-            start_surah_data = response.json()
-            total_ayahs_in_start_surah = start_surah_data.get('totalAyah', 0)
+            needed_surahs = list(range(start_surah, end_surah))
+            with ThreadPoolExecutor(max_workers=MAX_METADATA_WORKERS) as executor:
+                metadata = dict(zip(needed_surahs, executor.map(get_surah_metadata, needed_surahs)))
             
-            # Download remaining ayahs in the starting surah
-            for ayah_num in range(start_ayah_num, total_ayahs_in_start_surah + 1):
-                file_path = download_ayah_audio(start_surah, ayah_num, reciter_id, output_dir)
-                if file_path:
-                    downloaded_files.append(file_path)
+            # Remaining ayahs in the starting surah
+            total_ayahs_in_start_surah = metadata[start_surah].get('totalAyah', 0)
+            pairs.extend((start_surah, ayah_num) for ayah_num in range(start_ayah_num, total_ayahs_in_start_surah + 1))
             
-            # Download ayahs from surahs in between
-            for surah_num in range(start_surah + 1, end_surah):
-                # Get total ayahs in this surah
-                url = f"{API_BASE_URL}/{surah_num}.json"
-                response = requests.get(url)
-                response.raise_for_status()
-                surah_data = response.json()
-                total_ayahs = surah_data.get('totalAyah', 0)
-                
-                # Download all ayahs in this surah
-                for ayah_num in range(1, total_ayahs + 1):
-                    file_path = download_ayah_audio(surah_num, ayah_num, reciter_id, output_dir)
-                    if file_path:
-                        downloaded_files.append(file_path)
+            # Ayahs from surahs in between
+            for surah_num in needed_surahs[1:]:
+                total_ayahs = metadata[surah_num].get('totalAyah', 0)
+                pairs.extend((surah_num, ayah_num) for ayah_num in range(1, total_ayahs + 1))
             
-            # Download ayahs from the ending surah
-            for ayah_num in range(1, end_ayah_num + 1):
-                file_path = download_ayah_audio(end_surah, ayah_num, reciter_id, output_dir)
-                if file_path:
-                    downloaded_files.append(file_path)
+            # Ayahs from the ending surah
+            pairs.extend((end_surah, ayah_num) for ayah_num in range(1, end_ayah_num + 1))
                     
         except Exception as e:
-            logger.error(f"Error downloading ayah range: {e}")
+            logger.error(f"Error fetching ayah range: {e}")
             raise
     
-    return downloaded_files
+    return pairs
+
+
+def _scan_output_dir(output_dir: str) -> None:
+    """
+    Create the output directory and index the audio files already in it.
+    
+    Args:
+        output_dir: Directory the downloaded audio files are saved to
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Rescanning replaces the index, so files deleted since the last scan are dropped
+    with os.scandir(output_dir) as entries:
+        _existing_files[output_dir] = {entry.path for entry in entries if entry.name.endswith('.mp3')}
+
+
+async def _download_ayah_audio_async(client: "httpx.AsyncClient", semaphore: asyncio.Semaphore,
+                                    surah_num: int, ayah_num: int, reciter_id: str,
+                                    output_dir: str) -> Optional[str]:
+    """
+    Download audio for a specific ayah over a shared HTTP/2 client.
+    
+    Mirrors download_ayah_audio, with only the primary request made asynchronously.
+    
+    Args:
+        client: The httpx client whose connection is multiplexed across ayahs
+        semaphore: Limits how many ayahs are downloaded at once
+        surah_num: The surah number
+        ayah_num: The ayah number
+        reciter_id: The reciter ID
+        output_dir: Directory to save the downloaded audio
+        
+    Returns:
+        Path to the downloaded audio file or None if download fails
+    """
+    file_path = os.path.join(output_dir, f"{surah_num}_{ayah_num}_{reciter_id}.mp3")
+    
+    # The fallback source is rarely needed, so it reuses the blocking requests path
+    loop = asyncio.get_running_loop()
+    
+    # Waiting for a slot first means the primary-source checks see earlier results
+    async with semaphore:
+        tried_fallback = False
+        
+        try:
+            # If file already exists, return its path
+            if _audio_file_exists(output_dir, file_path):
+                logger.debug("Audio file already exists: %s", file_path)
+                return file_path
+            
+            # Try the fallback first if the primary source keeps missing this reciter,
+            # still falling through to the primary if the fallback fails
+            if _primary_source_missing(reciter_id):
+                tried_fallback = True
+                fallback_path = await loop.run_in_executor(
+                    None, _download_from_fallback, surah_num, ayah_num, reciter_id, file_path, SESSION
+                )
+                if fallback_path:
+                    return fallback_path
+            
+            audio_url = f"{AUDIO_BASE_URL}/{reciter_id}/{surah_num}_{ayah_num}.mp3"
+            response = await client.get(audio_url)
+            return _save_primary_response(response, reciter_id, file_path)
+        
+        except Exception as e:
+            if tried_fallback:
+                logger.error("Failed to download audio from both sources: %s", e)
+                return None
+            
+            logger.warning("Error downloading audio from primary source, trying fallback URL: %s", e)
+            return await loop.run_in_executor(
+                None, _download_from_fallback, surah_num, ayah_num, reciter_id, file_path, SESSION
+            )
+
+
+async def _download_all_async(pairs: List[Tuple[int, int]], reciter_id: str,
+                              output_dir: str) -> List[Optional[str]]:
+    """
+    Download all ayahs concurrently over a single multiplexed HTTP/2 client.
+    
+    Args:
+        pairs: Ordered list of (surah_number, ayah_number) tuples
+        reciter_id: The reciter ID
+        output_dir: Directory to save the downloaded audio files
+        
+    Returns:
+        Paths to the downloaded audio files (None for failures) in the order of pairs
+    """
+    semaphore = asyncio.Semaphore(MAX_DOWNLOAD_WORKERS)
+    limits = httpx.Limits(max_connections=MAX_DOWNLOAD_WORKERS)
+    transport = httpx.AsyncHTTPTransport(http2=True, retries=DOWNLOAD_RETRIES, limits=limits)
+    timeout = httpx.Timeout(DOWNLOAD_TIMEOUT)
+    async with httpx.AsyncClient(transport=transport, timeout=timeout, follow_redirects=True) as client:
+        return await asyncio.gather(*(
+            _download_ayah_audio_async(client, semaphore, surah_num, ayah_num, reciter_id, output_dir)
+            for surah_num, ayah_num in pairs
+        ))
+
+
+def download_ayah_pairs(pairs: List[Tuple[int, int]], reciter_id: str, output_dir: str) -> List[str]:
+    """
+    Download ayahs concurrently and return their paths in order.
+    
+    When httpx is installed all ayahs are fetched over a multiplexed HTTP/2 connection,
+    otherwise they are downloaded by a thread pool sharing the pooled requests session.
+    
+    Args:
+        pairs: Ordered list of (surah_number, ayah_number) tuples
+        reciter_id: The reciter ID
+        output_dir: Directory to save the downloaded audio files
+        
+    Returns:
+        List of paths to the downloaded audio files in sequence (failed downloads are skipped)
+    """
+    _scan_output_dir(output_dir)
+    _reset_primary_misses(reciter_id)
+    
+    if httpx is not None:
+        results = asyncio.run(_download_all_async(pairs, reciter_id, output_dir))
+    else:
+        with ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS) as executor:
+            futures = [
+                executor.submit(download_ayah_audio, surah_num, ayah_num, reciter_id, output_dir, SESSION)
+                for surah_num, ayah_num in pairs
+            ]
+            results = [future.result() for future in futures]
+    
+    return [file_path for file_path in results if file_path]
+
+
+def download_ayah_range(start_ayah: str, end_ayah: str, reciter_id: str, output_dir: str) -> List[str]:
+    """
+    Download a range of ayahs and return the paths to the downloaded files.
+    
+    Args:
+        start_ayah: Starting ayah in the format 'surah:ayah'
+        end_ayah: Ending ayah in the format 'surah:ayah'
+        reciter_id: The reciter ID
+        output_dir: Directory to save the downloaded audio files
+        
+    Returns:
+        List of paths to the downloaded audio files in sequence
+    """
+    pairs = get_ayah_range_pairs(start_ayah, end_ayah)
+    return download_ayah_pairs(pairs, reciter_id, output_dir)
 
 
 def get_reciter_id_by_name(reciter_name: str) -> str:
@@ -237,9 +715,10 @@ def get_reciter_id_by_name(reciter_name: str) -> str:
     Returns:
         The reciter ID
     """
-    reciters = get_available_reciters()
-    for reciter_id, name in reciters.items():
-        if name == reciter_name:
-            return reciter_id
+    try:
+        reciter_ids = _get_reciter_ids_by_name()
+    except Exception as e:
+        logger.error(f"Error fetching reciters: {e}")
+        reciter_ids = {name: reciter_id for reciter_id, name in DEFAULT_RECITERS.items()}
     # Default to Mishary Rashid Al Afasy if reciter not found
-    return "1"
\ No newline at end of file
+    return reciter_ids.get(reciter_name, "1")
\ No newline at end of file
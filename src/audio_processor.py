@@ -3,7 +3,11 @@ Module for processing and concatenating Quran audio files.
 """
 
 import os
-from typing import List, Optional
+import string
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 import logging
 from pydub import AudioSegment
 
@@ -11,11 +15,186 @@ from pydub import AudioSegment
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Ranges with more files than this are joined as a tree of parallel ffmpeg runs
+TREE_MERGE_THRESHOLD = 32
+TREE_MERGE_GROUP_SIZE = 16
+
+# Sample rates of MPEG audio frames, by the header's version bits (1 is reserved)
+_MPEG_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),   # MPEG-2.5
+}
+
+# How far into the audio data to look for the first frame header
+_MP3_HEADER_SEARCH_BYTES = 64 * 1024
+
+# Characters allowed in generated output filenames
+_FILENAME_CHARS = frozenset(string.ascii_letters + string.digits + '-_.')
+
+
+def _read_mp3_format(audio_file: str) -> Optional[Tuple[int, int]]:
+    """
+    Read the sample rate and channel count from the first MP3 frame header of a file.
+    
+    Args:
+        audio_file: Path to the mp3 file
+        
+    Returns:
+        Tuple of (sample_rate, channels) or None if no valid frame header was found
+    """
+    try:
+        with open(audio_file, 'rb') as f:
+            # Skip an ID3v2 tag, whose size is a 28-bit syncsafe integer
+            header = f.read(10)
+            offset = 0
+            if len(header) == 10 and header[:3] == b'ID3':
+                offset = 10 + ((header[6] & 0x7F) << 21 | (header[7] & 0x7F) << 14
+                               | (header[8] & 0x7F) << 7 | (header[9] & 0x7F))
+                if header[5] & 0x10:
+                    offset += 10
+            f.seek(offset)
+            data = f.read(_MP3_HEADER_SEARCH_BYTES)
+    except OSError as e:
+        logger.warning("Could not read audio file %s: %s", audio_file, e)
+        return None
+    
+    for i in range(len(data) - 3):
+        if data[i] != 0xFF or data[i + 1] & 0xE0 != 0xE0:
+            continue
+        version = (data[i + 1] >> 3) & 0x03
+        layer = (data[i + 1] >> 1) & 0x03
+        bitrate_index = data[i + 2] >> 4
+        sample_rate_index = (data[i + 2] >> 2) & 0x03
+        if version == 1 or layer == 0 or bitrate_index == 15 or sample_rate_index == 3:
+            continue
+        channels = 1 if data[i + 3] >> 6 == 3 else 2
+        return _MPEG_SAMPLE_RATES[version][sample_rate_index], channels
+    
+    return None
+
+
+def _concatenate_with_ffmpeg(audio_files: List[str], output_file: str) -> bool:
+    """
+    Join mp3 files with ffmpeg's concat demuxer, copying the streams without re-encoding.
+    
+    Args:
+        audio_files: List of paths to audio files to concatenate
+        output_file: Path to save the concatenated audio file
+        
+    Returns:
+        True if ffmpeg produced the output file, False otherwise
+    """
+    list_fd, list_path = tempfile.mkstemp(suffix=".txt", prefix="concat_list_")
+    try:
+        with os.fdopen(list_fd, 'w', encoding='utf-8') as f:
+            for audio_file in audio_files:
+                escaped_path = os.path.abspath(audio_file).replace("'", "'\\''")
+                f.write(f"file '{escaped_path}'\n")
+        
+        result = subprocess.run(
+            [AudioSegment.converter, '-y', '-loglevel', 'error',
+             '-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', output_file],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            logger.warning(f"ffmpeg stream copy failed: {result.stderr.strip()}")
+            return False
+        return True
+    
+    except OSError as e:
+        logger.warning(f"Could not run ffmpeg: {e}")
+        return False
+    
+    finally:
+        os.remove(list_path)
+
+
+def _concatenate_with_ffmpeg_tree(audio_files: List[str], output_file: str) -> bool:
+    """
+    Join many mp3 files by stream-copying groups in parallel, then joining the groups.
+    
+    Each group is handled by its own ffmpeg process, and the intermediate files are
+    merged the same way until few enough remain for a single pass. Stream copy keeps
+    the result identical to a single concat of all files.
+    
+    Args:
+        audio_files: List of paths to audio files to concatenate
+        output_file: Path to save the concatenated audio file
+        
+    Returns:
+        True if ffmpeg produced the output file, False otherwise
+    """
+    if len(audio_files) <= TREE_MERGE_THRESHOLD:
+        return _concatenate_with_ffmpeg(audio_files, output_file)
+    
+    with tempfile.TemporaryDirectory(prefix="concat_tree_") as temp_dir:
+        groups = [
+            audio_files[i:i + TREE_MERGE_GROUP_SIZE]
+            for i in range(0, len(audio_files), TREE_MERGE_GROUP_SIZE)
+        ]
+        intermediates = [os.path.join(temp_dir, f"part_{i:05d}.mp3") for i in range(len(groups))]
+        
+        # Threads are enough here since the work runs in separate ffmpeg processes
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            results = list(executor.map(_concatenate_with_ffmpeg, groups, intermediates))
+        
+        if not all(results):
+            return False
+        
+        return _concatenate_with_ffmpeg_tree(intermediates, output_file)
+
+
+def _concatenate_with_pydub(audio_files: List[str], output_file: str) -> Optional[str]:
+    """
+    Decode and re-encode the audio files with pydub, for inputs that cannot be stream-copied.
+    
+    Args:
+        audio_files: List of paths to audio files to concatenate
+        output_file: Path to save the concatenated audio file
+        
+    Returns:
+        Path to the concatenated audio file or None if failed
+    """
+    segments = []
+    
+    for audio_file in audio_files:
+        try:
+            segments.append(AudioSegment.from_mp3(audio_file))
+            logger.debug("Loaded audio file: %s", audio_file)
+        except Exception as e:
+            logger.error("Error processing file %s: %s", audio_file, e)
+            # Continue with other files if one fails
+    
+    if not segments:
+        logger.error("None of the audio files could be decoded")
+        return None
+    
+    # Bring every segment to the first one's format so the raw frames can be joined directly
+    first = segments[0]
+    segments = [
+        segment.set_frame_rate(first.frame_rate).set_channels(first.channels).set_sample_width(first.sample_width)
+        for segment in segments
+    ]
+    
+    # Join all raw data in one allocation; appending segment by segment copies the
+    # growing buffer on every step, which is quadratic in the number of ayahs
+    combined = first._spawn(b"".join(segment.raw_data for segment in segments))
+    combined.export(output_file, format="mp3")
+    return output_file
+
 
 def concatenate_audio_files(audio_files: List[str], output_file: str) -> Optional[str]:
     """
     Concatenate multiple audio files into a single file.
     
+    The files are joined with ffmpeg stream copy, which is lossless and avoids decoding;
+    long ranges are split into groups that are joined in parallel. Stream copy only
+    produces a valid file when every input has the same sample rate and channel count,
+    and ffmpeg does not check this, so files with differing (or unreadable) formats are
+    re-encoded with pydub instead. pydub is also used if ffmpeg fails.
+    
     Args:
         audio_files: List of paths to audio files to concatenate
         output_file: Path to save the concatenated audio file
@@ -33,25 +212,21 @@ def concatenate_audio_files(audio_files: List[str], output_file: str) -> Optiona
             logger.error("No audio files to concatenate")
             return None
         
-        # Load the first audio file
-        combined = AudioSegment.from_mp3(audio_files[0])
-        logger.info(f"Loaded first audio file: {audio_files[0]}")
-        
-        # Add the rest of the audio files
-        for audio_file in audio_files[1:]:
-            try:
-                sound = AudioSegment.from_mp3(audio_file)
-                combined += sound
-                logger.info(f"Added audio file: {audio_file}")
-            except Exception as e:
-                logger.error(f"Error processing file {audio_file}: {e}")
-                # Continue with other files if one fails
-        
-        # Export the combined audio file
-        combined.export(output_file, format="mp3")
-        logger.info(f"Successfully created concatenated audio file: {output_file}")
+        # Ayahs can come from different hosts (primary CDN and fallback URLs), so
+        # check their formats match before copying the streams together
+        formats = {_read_mp3_format(audio_file) for audio_file in audio_files}
+        if len(formats) == 1 and None not in formats:
+            if _concatenate_with_ffmpeg_tree(audio_files, output_file):
+                logger.info(f"Successfully created concatenated audio file: {output_file}")
+                return output_file
+            logger.info("Falling back to pydub re-encoding")
+        else:
+            logger.info("Audio files have differing formats %s, re-encoding with pydub", formats)
         
-        return output_file
+        result = _concatenate_with_pydub(audio_files, output_file)
+        if result:
+            logger.info(f"Successfully created concatenated audio file: {output_file}")
+        return result
     
     except Exception as e:
         logger.error(f"Error concatenating audio files: {e}")
@@ -83,7 +258,7 @@ def generate_output_filename(start_ayah: str, end_ayah: str, surah_name: str) ->
         filename = f"{surah_num}_{surah_name}_{start_ayah_num}-{end_ayah_num}.mp3"
         
         # Remove any special characters that are not suitable for filenames
-        filename = "".join(c for c in filename if c.isalnum() or c in ['-', '_', '.'])
+        filename = "".join(filter(_FILENAME_CHARS.__contains__, filename))
         
         return filename
     